@@ -1,10 +1,13 @@
-import gzip
-import xml.etree.ElementTree as ET
+import html
 import json
 import re
 from datetime import datetime
-from urllib.parse import urlparse, urljoin
+from io import BufferedReader, BytesIO
+from itertools import chain
 from scrapy import Spider, Request
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.threads import deferToThread
+from lxml import etree
 import sys
 from pathlib import Path
 import time
@@ -19,6 +22,145 @@ except ImportError:
     import os
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+
+    def json_dumps_indented(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    def json_dumps_indented(obj):
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+
+try:
+    # ISA-L's SIMD inflate is a drop-in, several times faster GzipFile
+    from isal.igzip import GzipFile
+except ImportError:
+    from gzip import GzipFile
+
+SITEMAP_LOC_TAG = '{http://www.sitemaps.org/schemas/sitemap/0.9}loc'
+SITEMAP_URL_TAG = '{http://www.sitemaps.org/schemas/sitemap/0.9}url'
+SITEMAP_READ_BUFFER = 256 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+# Plain or CDATA-wrapped <loc> text; CDATA content is taken verbatim
+SITEMAP_LOC_RE = re.compile(rb'<loc>\s*(?:<!\[CDATA\[(.*?)\]\]>|([^<]*))\s*</loc>', re.DOTALL)
+# Root element, optionally namespace-prefixed: <urlset> or <sitemapindex>
+SITEMAP_ROOT_RE = re.compile(rb'<(?:[\w.-]+:)?(urlset|sitemapindex)[\s/>]')
+
+# A product page lives exactly one path segment below the site root
+# (e.g. https://site.com/some-product.html); anything else is a listing page.
+PDP_URL_RE = re.compile(r'[^:/?#]+://[^/?#]*/+[^/?#]+/*(?:[?#]|$)')
+PRICE_JUNK_RE = re.compile(r'[^\d.,]')
+# "1.234,56" -> "1234.56" in a single pass
+COMMA_DECIMAL_TABLE = str.maketrans({'.': None, ',': '.'})
+# An http(s) URL with a known image extension anywhere after the scheme
+# (CDNs append query strings)
+IMAGE_URL_RE = re.compile(r'https?://.*?\.(?:jpe?g|png|gif|webp|svg|bmp)', re.IGNORECASE | re.DOTALL)
+
+# Page XPaths, compiled once and run against response.selector.root. Plain
+# str results (smart_strings=False) go straight into orjson and don't pin the tree.
+def _class_test(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+JSON_LD_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()', smart_strings=False)
+APP_DATA_XPATH = etree.XPath('//script[@data-hypernova-key="App"]/text()', smart_strings=False)
+PRODUCT_NAME_XPATH = etree.XPath('//*[@id="contentId"]/div/div[1]/div[2]/div[2]/h1/text()', smart_strings=False)
+PRODUCT_ID_XPATH = etree.XPath('//div[@data-id]/@data-id', smart_strings=False)
+HIGHLIGHT_ITEMS_XPATH = etree.XPath(f"//div[{_class_test('product-hightlights-items-item')}]")
+HIGHLIGHT_TITLE_XPATH = etree.XPath(
+    f".//span[{_class_test('product-hightlights-items-item-title')}]/text()", smart_strings=False)
+HIGHLIGHT_DESC_XPATH = etree.XPath(
+    f".//p[{_class_test('product-hightlights-items-item-desc')}]/text()", smart_strings=False)
+
+def open_sitemap(body):
+    """Return a file object over the (possibly gzipped) sitemap body"""
+    # HttpCompressionMiddleware already inflates Content-Encoding: gzip
+    # responses, so only .gz files served as-is still carry the magic number.
+    if body[:2] == GZIP_MAGIC:
+        # Decompress while scanning rather than materializing the whole XML
+        return BufferedReader(GzipFile(fileobj=BytesIO(body)),
+                              buffer_size=SITEMAP_READ_BUFFER)
+    return BytesIO(body)
+
+def iter_sitemap_locs(source, head=b''):
+    """Yield <loc> texts with a byte-level regex scan, one buffer at a time
+
+    head is data already read from source (the caller's peek at the root).
+    """
+    tail = b''
+    for chunk in chain((head,), iter(lambda: source.read(SITEMAP_READ_BUFFER), b'')):
+        data = tail + chunk
+        # Only scan up to the last complete </loc>; the rest waits for the next chunk
+        end = data.rfind(b'</loc>')
+        if end < 0:
+            tail = data
+            continue
+        end += len(b'</loc>')
+        for cdata, raw in SITEMAP_LOC_RE.findall(data, 0, end):
+            if cdata:
+                url = cdata.decode('utf-8', 'replace').strip()
+            else:
+                url = raw.decode('utf-8', 'replace').strip()
+                if '&' in url:
+                    url = html.unescape(url)
+            if url:
+                yield url
+        tail = data[end:]
+
+def iter_sitemap_locs_xml(source):
+    """Yield <loc> texts with lxml, for sitemaps the regex scan can't read"""
+    for _, loc in etree.iterparse(source, tag=SITEMAP_LOC_TAG,
+                                  huge_tree=True, resolve_entities=False):
+        url = (loc.text or '').strip()
+        loc.clear()
+        # Drop the <url> entries already parsed so the root doesn't keep an
+        # empty element per URL alive; the current one is still open
+        entry = loc.getparent()
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
+        # A <sitemapindex> lists child sitemaps under <sitemap>, not pages
+        if url and entry.tag == SITEMAP_URL_TAG:
+            yield url
+
+# schema.org ItemAvailability name (the part after the last '/' or ':') -> Ref Status
+AVAILABILITY_STATUS = {
+    'instock': 'Active',
+    'preorder': 'Active',
+    'outofstock': 'Out of Stock',
+    'soldout': 'Out of Stock',
+}
+
+# Breadcrumb names that are navigation, not product categories
+SKIP_CATEGORY_NAMES = frozenset({'home', 'shop', 'all'})
+
+PRODUCT_TYPES = frozenset({'Product', 'ProductGroup', 'ProductModel', 'IndividualProduct', 'SomeProducts'})
+
+def is_product_type(data_type):
+    """True for a JSON-LD @type (string or list of strings) naming a Product"""
+    if isinstance(data_type, str):
+        return data_type in PRODUCT_TYPES
+    if isinstance(data_type, list):
+        return any(isinstance(t, str) and t in PRODUCT_TYPES for t in data_type)
+    return False
+
+_last_timestamp = (0, '')
+
+def scrape_timestamp():
+    """Local time as '%Y-%m-%d %H:%M:%S', formatted at most once per second"""
+    global _last_timestamp
+    now = int(time.time())
+    if _last_timestamp[0] != now:
+        _last_timestamp = (now, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)))
+    return _last_timestamp[1]
+
 class ProductFetcher(Spider):
     name = 'product'
     
@@ -52,10 +194,6 @@ class ProductFetcher(Spider):
         self.max_urls_per_sitemap = int(kwargs.get('max_urls_per_sitemap', 0))
         self.job_id = kwargs.get('job_id', datetime.now().strftime('%Y%m%d_%H%M%S'))
         
-        parsed_url = urlparse(self.website_url)
-        self.domain = parsed_url.netloc
-        self.base_domain = '.'.join(self.domain.split('.')[-2:]).replace('.', '_')
-        
         # SIMPLE DEDUPLICATION: Use a set to track URLs processed in this job
         self.processed_in_this_job = set()
         
@@ -65,10 +203,8 @@ class ProductFetcher(Spider):
         if not self.is_ashley:
             try:
                 sitemap_processor = SitemapProcessor()
-                self.sitemap_index_url = sitemap_processor.get_sitemap_from_robots(self.website_url)
+                self.sitemap_index_url, self.all_sitemaps = sitemap_processor.discover_sitemaps(self.website_url)
                 self.logger.info(f"Found sitemap index: {self.sitemap_index_url}")
-                
-                self.all_sitemaps = sitemap_processor.extract_all_sitemaps(self.sitemap_index_url)
                 self.logger.info(f"Total sitemaps discovered: {len(self.all_sitemaps)}")
                 
                 self.sitemap_chunk = sitemap_processor.get_sitemap_chunks(
@@ -99,10 +235,8 @@ class ProductFetcher(Spider):
         """Normalize URL for consistent deduplication"""
         if not url:
             return url
-        # Remove trailing slash and fragment
-        parsed = urlparse(url)
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path.rstrip('/')}"
-        return normalized
+        # Remove query, fragment and trailing slash
+        return url.split('#', 1)[0].split('?', 1)[0].rstrip('/')
           
     def start_requests(self):
         if self.is_ashley:
@@ -174,30 +308,50 @@ class ProductFetcher(Spider):
                 errback=self.handle_sitemap_error
             )
     
-    def parse_product_sitemap(self, response):
-        if response.url.endswith('.gz'):
-            content = gzip.decompress(response.body)
-            root = ET.fromstring(content)
-        else:
-            root = ET.fromstring(response.body)
-        
-        ns = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-        all_urls = [url.text for url in root.findall('ns:url/ns:loc', ns) if url.text]
-        
-        if self.max_urls_per_sitemap > 0:
-            all_urls = all_urls[:self.max_urls_per_sitemap]
-        
-        self.logger.info(f"Processing {len(all_urls)} URLs from sitemap")
-        
-        plp_count = 0
-        pdp_count = 0
+    def read_sitemap_urls(self, body):
+        """Parse a sitemap body into (url_count, plp_count, pdp_urls); safe to run off the reactor thread"""
+        source = open_sitemap(body)
+        head = source.read(SITEMAP_READ_BUFFER)
+        root = SITEMAP_ROOT_RE.search(head)
+        if root and root.group(1) == b'sitemapindex':
+            # Its <loc>s are child sitemaps, not pages
+            return 0, 0, []
+        url_count = 0
+        # No plain <loc> in the first buffer: don't buffer the rest looking for one
+        if b'<loc>' in head:
+            url_count, plp_count, pdp_urls = self.filter_sitemap_urls(iter_sitemap_locs(source, head))
+        if not url_count:
+            # Namespace-prefixed tags (<sm:loc>): let a real XML parser have a go
+            url_count, plp_count, pdp_urls = self.filter_sitemap_urls(iter_sitemap_locs_xml(open_sitemap(body)))
+        # Drop repeats within the sitemap here, off the reactor thread; the
+        # job-wide set in parse_product_sitemap still catches the rest
+        return url_count, plp_count, list(dict.fromkeys(pdp_urls))
 
-        for url in all_urls:
+    def filter_sitemap_urls(self, urls):
+        url_count = 0
+        plp_count = 0
+        pdp_urls = []
+        for url in urls:
+            if 0 < self.max_urls_per_sitemap <= url_count:
+                break
+            url_count += 1
             if self._is_plp_url(url):
                 plp_count += 1
-                continue
-            pdp_count += 1
-            
+            else:
+                pdp_urls.append(url)
+        return url_count, plp_count, pdp_urls
+
+    async def parse_product_sitemap(self, response):
+        # Parsing and filtering tens of thousands of URLs is pure CPU work; do it
+        # in the reactor thread pool so product downloads keep flowing meanwhile.
+        url_count, plp_count, pdp_urls = await maybe_deferred_to_future(
+            deferToThread(self.read_sitemap_urls, response.body)
+        )
+        
+        callback = self.parse_product_page_with_check
+        errback = self.handle_product_error
+
+        for url in pdp_urls:
             normalized_url = self.normalize_url(url)
             
             # Check if URL already processed in this job
@@ -208,24 +362,18 @@ class ProductFetcher(Spider):
             # Add to job tracking set
             self.processed_in_this_job.add(normalized_url)
             
-            yield Request(
-                url,
-                callback=self.parse_product_page_with_check,
-                meta={'url': url},
-                errback=self.handle_product_error
-            )
+            yield Request(url, callback=callback, errback=errback)
         
-        self.logger.info(f"Filtered {plp_count} PLP pages, {pdp_count} PDP pages to scrape")
+        self.logger.info(f"Processed {url_count} URLs from sitemap")
+        self.logger.info(f"Filtered {plp_count} PLP pages, {len(pdp_urls)} PDP pages to scrape")
+        duplicate_count = url_count - plp_count - len(pdp_urls)
+        if duplicate_count:
+            self.logger.info(f"Skipped {duplicate_count} duplicate PDP URLs within the sitemap")
     
     def _is_plp_url(self, url: str) -> bool:
-        parsed_url = urlparse(url)
-        path = parsed_url.path.strip('/')
-        
-        if not path:
-            return True
-        return '/' in path
+        return PDP_URL_RE.match(url) is None
 
-    def parse_product_page_with_check(self, response):
+    async def parse_product_page_with_check(self, response):
         # Simple deduplication check
         normalized_url = self.normalize_url(response.url)
         
@@ -237,65 +385,96 @@ class ProductFetcher(Spider):
             # Add to tracking set if not already there
             self.processed_in_this_job.add(normalized_url)
         
-        json_scripts = response.xpath('//script[@type="application/ld+json"]/text()').getall()
-        has_product_json = False
-        for script in json_scripts:
-            try:
-                data = json.loads(script.strip())
-                if isinstance(data, dict):
-                    data_type = data.get('@type')
-                    if data_type:
-                        if isinstance(data_type, str):
-                            if 'Product' in data_type:
-                                has_product_json = True
-                                break
-                        elif isinstance(data_type, list):
-                            if any('Product' in str(t) for t in data_type):
-                                has_product_json = True
-                                break
-                    elif data.get('name') and (data.get('offers') or data.get('sku')):
-                        has_product_json = True
-                        break
-                elif isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict):
-                            item_type = item.get('@type')
-                            if item_type:
-                                if isinstance(item_type, str) and 'Product' in item_type:
-                                    has_product_json = True
-                                    break
-                                elif isinstance(item_type, list) and any('Product' in str(t) for t in item_type):
-                                    has_product_json = True
-                                    break
-                    if has_product_json:
-                        break
-            except Exception as e:
-                self.logger.debug(f"Error parsing JSON-LD: {e}")
-                continue
-        
+        # Decoding the page's JSON and building the item is pure CPU work; like
+        # sitemap parsing, run it in the thread pool so downloads keep flowing.
+        has_product_json, app_data, item = await maybe_deferred_to_future(
+            deferToThread(self.extract_product, response)
+        )
         if has_product_json:
             self.logger.info(f"✅ Found Product JSON-LD for {response.url}")
-            yield from self.parse_product_page(response)
-            yield from self.extract_bundle_products(response)
+            yield item
+            for request in self.extract_bundle_products(response, app_data):
+                yield request
         else:
             self.logger.warning(f"⚠️ No Product JSON-LD found for {response.url}")
-            yield from self.parse_product_page(response)
+            yield item
+
+    def extract_product(self, response):
+        """Parse a product page into (has_product_json, app_data, item); safe to run off the reactor thread"""
+        json_ld = self.load_json_ld(response)
+        app_data = self.parse_app_data(response)
+        item = self.parse_product_page(response, app_data, json_ld)
+        return self.has_product_json_ld(json_ld), app_data, item
+
+    def load_json_ld(self, response):
+        """Decode every JSON-LD block on the page once; unparsable blocks are skipped"""
+        json_ld = []
+        for script in JSON_LD_XPATH(response.selector.root):
+            try:
+                json_ld.append(json_loads(script))
+            except ValueError as e:
+                self.logger.debug(f"Error parsing JSON-LD: {e}")
+        return json_ld
+
+    def has_product_json_ld(self, json_ld):
+        for data in json_ld:
+            if isinstance(data, dict):
+                data_type = data.get('@type')
+                if data_type:
+                    if is_product_type(data_type):
+                        return True
+                elif data.get('name') and (data.get('offers') or data.get('sku')):
+                    return True
+            elif isinstance(data, list):
+                if any(isinstance(item, dict) and is_product_type(item.get('@type')) for item in data):
+                    return True
+        return False
     
-    def extract_bundle_products(self, response):
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if not json_script:
+    def parse_app_data(self, response):
+        """Parse the hypernova App payload once; returns {} when it is missing or invalid"""
+        # Cheap byte scan before walking the whole DOM for a script that isn't there
+        if b'data-hypernova-key' not in response.body:
+            return {}
+        json_scripts = APP_DATA_XPATH(response.selector.root)
+        if not json_scripts or not json_scripts[0]:
+            return {}
+        json_script = json_scripts[0]
+        # The payload is an object wrapped in <!-- ... --> and whitespace;
+        # slice straight to the braces instead of stripping in several passes
+        start = json_script.find('{')
+        end = json_script.rfind('}') + 1
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json_loads(json_script[start:end])
+        except ValueError as e:
+            self.logger.debug(f"Error parsing hypernova App data: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def find_simple_item(self, app_data, url):
+        """Return the productLayouts.simpleItems entry for url, if any"""
+        try:
+            simple_items = app_data.get('data', {}).get('content', {}).get('productLayouts', {}).get('simpleItems', [])
+            current_url = url.rstrip('/')
+            for item in simple_items:
+                if isinstance(item, dict):
+                    item_url = item.get('url', '').rstrip('/')
+                    if item_url and item_url == current_url:
+                        return item
+        except Exception as e:
+            self.logger.debug(f"Error matching simpleItems: {e}")
+        return None
+
+    def extract_bundle_products(self, response, app_data):
+        if not app_data:
             return
         try:
-            json_script = json_script.strip()
-            if json_script.startswith('<!--'):
-                json_script = json_script[4:]
-            if json_script.endswith('-->'):
-                json_script = json_script[:-3]
-            json_script = json_script.strip()
-            data = json.loads(json_script)
-            content = data.get('data', {}).get('content', {})
+            content = app_data.get('data', {}).get('content', {})
             product_layouts = content.get('productLayouts', {})
             simple_items = product_layouts.get('simpleItems', [])
+            callback = self.parse_product_page_with_check
+            errback = self.handle_product_error
             for item in simple_items:
                 if isinstance(item, dict):
                     sub_product_url = item.get('url')
@@ -315,380 +494,200 @@ class ProductFetcher(Spider):
                     self.processed_in_this_job.add(normalized_url)
                     
                     self.logger.info(f"📦 Found unique sub-product: {item_short_name}")
-                    yield Request(
-                        sub_product_url,
-                        callback=self.parse_product_page_with_check,
-                        meta={'url': sub_product_url},
-                        errback=self.handle_product_error
-                    )
+                    yield Request(sub_product_url, callback=callback, errback=errback)
         except Exception as e:
             self.logger.error(f"Error extracting bundle products: {e}")
 
-    def parse_product_page(self, response):
-        item = {}
-
-        sku = self.extract_sku(response)
-        item['Ref Product URL'] = response.url
-        item['Ref SKU'] = sku
-        item['Date Scrapped'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        item['Ref Product Name'] = self.extract_product_name(response)
-        item['Ref Price'] = self.extract_price(response)
-        item['Ref MPN'] = self.extract_mpn(response)
-        item['Ref GTIN'] = self.extract_gtin(response)
-        item['Ref Brand Name'] = self.extract_brand(response)
-        item['Ref Main Image'] = self.extract_main_image(response)
-        item['Ref Category'] = self.extract_category(response)
-        item['Ref Category URL'] = self.extract_category_url(response)
-        item['Ref Quantity'] = self.extract_quantity(response)
-        item['Ref Status'] = self.extract_status(response)
-        item['Ref Product ID'] = self.extract_product_id(response)
-        item['Ref Variant ID'] = self.extract_variant_id(response)
-        item['Ref Group Attr 1'] = self.extract_group_attr1(response, 1)
-        item['Ref Group Attr 2'] = self.extract_group_attr2(response, 2)
-        item['Ref Images'] = self.extract_main_images(response)
-        item['Ref Highlights'] = self.extract_highlights(response)
-        item['Ref Dimensions'] = self.extract_dimensions(response)
-        yield item
+    def split_json_ld(self, json_ld):
+        """Pick the Product and BreadcrumbList blocks out of the decoded JSON-LD"""
+        products = []
+        breadcrumbs = []
+        for data in json_ld:
+            if not isinstance(data, dict):
+                continue
+            data_type = data.get('@type')
+            if data_type == 'Product' or data_type == 'ProductGroup':
+                products.append(data)
+            elif data_type == 'BreadcrumbList':
+                breadcrumbs.append(data)
+        return products, breadcrumbs
+
+    def parse_product_page(self, response, app_data, json_ld):
+        products, breadcrumbs = self.split_json_ld(json_ld)
+        simple_item = self.find_simple_item(app_data, response.url)
+
+        return {
+            'Ref Product URL': response.url,
+            'Ref SKU': self.extract_sku(simple_item, products),
+            'Date Scrapped': scrape_timestamp(),
+            'Ref Product Name': self.extract_product_name(response, simple_item),
+            'Ref Price': self.extract_price(products),
+            'Ref MPN': self.extract_mpn(simple_item, products),
+            'Ref GTIN': self.extract_gtin(response),
+            'Ref Brand Name': self.extract_brand(products),
+            'Ref Main Image': self.extract_main_image(simple_item, products),
+            'Ref Category': self.extract_category(breadcrumbs),
+            'Ref Category URL': self.extract_category_url(breadcrumbs),
+            'Ref Quantity': self.extract_quantity(response),
+            'Ref Status': self.extract_status(products),
+            'Ref Product ID': self.extract_product_id(response, simple_item),
+            'Ref Variant ID': self.extract_variant_id(response),
+            'Ref Group Attr 1': self.extract_group_attr1(products, 1),
+            'Ref Group Attr 2': self.extract_group_attr2(response, 2),
+            'Ref Images': self.extract_main_images(app_data, simple_item),
+            'Ref Highlights': self.extract_highlights(response),
+            'Ref Dimensions': self.extract_dimensions(app_data),
+        }
        
-    def extract_product_name(self, response):
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if json_script:
-            try:
-                json_script = json_script.strip()
-                if json_script.startswith('<!--'):
-                    json_script = json_script[4:]
-                if json_script.endswith('-->'):
-                    json_script = json_script[:-3]
-                json_script = json_script.strip()
-                
-                data = json.loads(json_script)
-                content = data.get('data', {}).get('content', {})
-                product_layouts = content.get('productLayouts', {})
-                simple_items = product_layouts.get('simpleItems', [])
-                
-                current_url = response.url.rstrip('/')
-                
-                for item in simple_items:
-                    if isinstance(item, dict):
-                        item_url = item.get('url', '').rstrip('/')
-                        if item_url and item_url == current_url:
-                            name = item.get('name', '')
-                            if name:
-                                return name
-            except Exception as e:
-                self.logger.debug(f"Error extracting name from simpleItems: {e}")
+    def extract_product_name(self, response, simple_item):
+        if simple_item:
+            name = simple_item.get('name', '')
+            if name:
+                return name
 
-        selectors = [
-            '//*[@id="contentId"]/div/div[1]/div[2]/div[2]/h1/text()'
-        ]
-        return self.extract_using_selectors(response, selectors)
+        names = PRODUCT_NAME_XPATH(response.selector.root)
+        return names[0].strip() if names else ''
     
-    def extract_price(self, response):
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    offers = data.get('offers', {})
-                    if isinstance(offers, dict) and 'price' in offers:
-                        return str(offers['price'])
-            except:
-                continue
+    def extract_price(self, products):
+        for data in products:
+            offers = data.get('offers', {})
+            if isinstance(offers, dict) and 'price' in offers:
+                return str(offers['price'])
         return ''
     
-    def extract_sku(self, response):
-        # Try to get SKU from simpleItems by matching URL
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if json_script:
-            try:
-                json_script = json_script.strip()
-                if json_script.startswith('<!--'):
-                    json_script = json_script[4:]
-                if json_script.endswith('-->'):
-                    json_script = json_script[:-3]
-                json_script = json_script.strip()
-                
-                data = json.loads(json_script)
-                content = data.get('data', {}).get('content', {})
-                product_layouts = content.get('productLayouts', {})
-                simple_items = product_layouts.get('simpleItems', [])
-                
-                current_url = response.url.rstrip('/')
-                
-                for item in simple_items:
-                    if isinstance(item, dict):
-                        item_url = item.get('url', '').rstrip('/')
-                        if item_url and item_url == current_url:
-                            sku = item.get('sku', '')
-                            if sku:
-                                return sku
-            except Exception as e:
-                self.logger.debug(f"Error extracting SKU from simpleItems: {e}")
-        
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    return data.get('sku', '')
-            except:
-                continue
+    def extract_sku(self, simple_item, products):
+        # Prefer the SKU of the simpleItems entry matching this URL
+        if simple_item:
+            sku = simple_item.get('sku', '')
+            if sku:
+                return sku
         
+        if products:
+            return products[0].get('sku', '')
         return ''
     
-    def extract_mpn(self, response):
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if json_script:
-            try:
-                json_script = json_script.strip()
-                if json_script.startswith('<!--'):
-                    json_script = json_script[4:]
-                if json_script.endswith('-->'):
-                    json_script = json_script[:-3]
-                json_script = json_script.strip()
-                
-                data = json.loads(json_script)
-                content = data.get('data', {}).get('content', {})
-                product_layouts = content.get('productLayouts', {})
-                simple_items = product_layouts.get('simpleItems', [])
-                
-                current_url = response.url.rstrip('/')
-                
-                for item in simple_items:
-                    if isinstance(item, dict):
-                        item_url = item.get('url', '').rstrip('/')
-                        if item_url and item_url == current_url:
-                            sku = item.get('sku', '')
-                            if sku:
-                                return sku
-            except Exception as e:
-                self.logger.debug(f"Error extracting SKU from simpleItems: {e}")
+    def extract_mpn(self, simple_item, products):
+        if simple_item:
+            sku = simple_item.get('sku', '')
+            if sku:
+                return sku
 
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    return data.get('mpn', '')
-            except:
-                continue
+        if products:
+            return products[0].get('mpn', '')
         return ''
 
     def extract_gtin(self, response):
         return ''
     
-    def extract_brand(self, response):
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    brand = data.get('brand', {})
-                    if isinstance(brand, dict):
-                        return brand.get('name', '')
-                    else:
-                        return str(brand)
-            except:
-                continue
+    def extract_brand(self, products):
+        if products:
+            brand = products[0].get('brand', {})
+            if isinstance(brand, dict):
+                return brand.get('name', '')
+            else:
+                return str(brand)
         return ''
     
-    def extract_main_image(self, response):
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if json_script:
-            try:
-                json_script = json_script.strip()
-                if json_script.startswith('<!--'):
-                    json_script = json_script[4:]
-                if json_script.endswith('-->'):
-                    json_script = json_script[:-3]
-                json_script = json_script.strip()
-                
-                data = json.loads(json_script)
-                content = data.get('data', {}).get('content', {})
-                product_layouts = content.get('productLayouts', {})
-                simple_items = product_layouts.get('simpleItems', [])
-                
-                current_url = response.url.rstrip('/')
-                
-                for item in simple_items:
-                    if isinstance(item, dict):
-                        item_url = item.get('url', '').rstrip('/')
-                        if item_url and item_url == current_url:
-                            gallery = item.get('gallery', [])
-                            if isinstance(gallery, list) and gallery:
-                                for img in gallery:
-                                    if isinstance(img, dict):
-                                        original_url = img.get('original', '')
-                                        return original_url
-            except Exception as e:
-                self.logger.debug(f"Error extracting main image from simpleItems gallery: {e}")
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    return data.get('image', '')
-            except:
-                continue
+    def extract_main_image(self, simple_item, products):
+        if simple_item:
+            gallery = simple_item.get('gallery', [])
+            if isinstance(gallery, list) and gallery:
+                for img in gallery:
+                    if isinstance(img, dict):
+                        original_url = img.get('original', '')
+                        return original_url
+        if products:
+            return products[0].get('image', '')
         return ''
     
-    def extract_category(self, response):
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
+    def extract_category(self, breadcrumbs):
+        for data in breadcrumbs:
             try:
-                data = json.loads(script)
-                if data.get('@type') == 'BreadcrumbList':
-                    categories = []
-                    for item in data.get('itemListElement', []):
-                        item_data = item.get('item', {})
-                        name = item_data.get('name', '')
-                        if name and name.lower() not in ['home', 'shop', 'all']:
-                            categories.append(name)
-                    if len(categories) > 1:
-                        categories = categories[:-1]
-                    if categories:
-                        return ' > '.join(categories)
-            except:
+                categories = []
+                for item in data.get('itemListElement', []):
+                    item_data = item.get('item', {})
+                    name = item_data.get('name', '')
+                    if name and name.lower() not in SKIP_CATEGORY_NAMES:
+                        categories.append(name)
+                if len(categories) > 1:
+                    categories = categories[:-1]
+                if categories:
+                    return ' > '.join(categories)
+            except (AttributeError, TypeError):
+                # Malformed itemListElement entries (non-dict items)
                 continue
         return ''
 
-    def extract_category_url(self, response):
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
+    def extract_category_url(self, breadcrumbs):
+        for data in breadcrumbs:
             try:
-                data = json.loads(script)
-                if data.get('@type') == 'BreadcrumbList':
-                    urls = []
-                    for item in data.get('itemListElement', []):
-                        item_data = item.get('item', {})
-                        url = item_data.get('@id', '')
-                        if url:
-                            urls.append(url)
-                    if len(urls) >= 2:
-                        return urls[-2]
-            except:
+                urls = []
+                for item in data.get('itemListElement', []):
+                    item_data = item.get('item', {})
+                    url = item_data.get('@id', '')
+                    if url:
+                        urls.append(url)
+                if len(urls) >= 2:
+                    return urls[-2]
+            except (AttributeError, TypeError):
+                # Malformed itemListElement entries (non-dict items)
                 continue
         return ''
     
     def extract_quantity(self, response):
         return ''
 
-    def extract_status(self, response):
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    offers = data.get('offers', {})
-                    if isinstance(offers, dict):
-                        availability = str(offers.get('availability', '')).lower()
-                        if 'instock' in availability:
-                            return 'Active'
-                        elif 'outofstock' in availability or 'soldout' in availability:
-                            return 'Out of Stock'
-                        elif 'preorder' in availability:
-                            return 'Active'
-            except:
-                continue
+    def extract_status(self, products):
+        for data in products:
+            offers = data.get('offers', {})
+            if isinstance(offers, dict):
+                # Full IRI (https://schema.org/InStock), compact IRI (schema:InStock) or bare name
+                availability = str(offers.get('availability', '')).strip().rsplit('/', 1)[-1].rsplit(':', 1)[-1]
+                status = AVAILABILITY_STATUS.get(availability.lower())
+                if status:
+                    return status
         return ''
     
-    def extract_product_id(self, response):
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if json_script:
-            try:
-                json_script = json_script.strip()
-                if json_script.startswith('<!--'):
-                    json_script = json_script[4:]
-                if json_script.endswith('-->'):
-                    json_script = json_script[:-3]
-                json_script = json_script.strip()
-                
-                data = json.loads(json_script)
-                content = data.get('data', {}).get('content', {})
-                product_layouts = content.get('productLayouts', {})
-                simple_items = product_layouts.get('simpleItems', [])
-                
-                current_url = response.url.rstrip('/')
-                
-                for item in simple_items:
-                    if isinstance(item, dict):
-                        item_url = item.get('url', '').rstrip('/')
-                        if item_url and item_url == current_url:
-                            productId = item.get('productId', '')
-                            if productId:
-                                return productId
-            except Exception as e:
-                self.logger.debug(f"Error extracting productId from simpleItems: {e}")
+    def extract_product_id(self, response, simple_item):
+        if simple_item:
+            productId = simple_item.get('productId', '')
+            if productId:
+                return productId
 
-        product_id = response.xpath('//div[@data-id]/@data-id').get()        
-        if product_id:
-            return product_id
+        product_ids = PRODUCT_ID_XPATH(response.selector.root)
+        if product_ids and product_ids[0]:
+            return product_ids[0]
         return ''
     
     def extract_variant_id(self, response):
         return ''
     
-    def extract_group_attr1(self, response, attr_num):
-        for script in response.xpath('//script[@type="application/ld+json"]/text()').getall():
-            try:
-                data = json.loads(script)
-                if data.get('@type') == 'Product' or data.get('@type') == 'ProductGroup':
-                    return data.get('color', '')
-            except:
-                continue
+    def extract_group_attr1(self, products, attr_num):
+        if products:
+            return products[0].get('color', '')
         return ''
 
     def extract_group_attr2(self, response, attr_num):
         return ''
        
-    def extract_using_selectors(self, response, selectors):
-        for selector in selectors:
-            if selector.startswith('//'):
-                result = response.xpath(selector).get()
-            else:
-                result = response.css(selector).get()
-            
-            if result:
-                cleaned = result.strip()
-                if cleaned:
-                    return cleaned
-        return ''
-
     def extract_highlights(self, response):
         highlights = []
-        highlight_items = response.xpath('//div[contains(@class, "product-hightlights-items-item")]')       
-        for item in highlight_items:
-            title = item.xpath('.//span[contains(@class, "product-hightlights-items-item-title")]/text()').get()
-            desc = item.xpath('.//p[contains(@class, "product-hightlights-items-item-desc")]/text()').get()
-            if title:
+        for item in HIGHLIGHT_ITEMS_XPATH(response.selector.root):
+            titles = HIGHLIGHT_TITLE_XPATH(item)
+            if titles and titles[0]:
+                descs = HIGHLIGHT_DESC_XPATH(item)
                 highlights.append({
-                    'title': title.strip() if title else '',
-                    'desc': desc.strip() if desc else ''
+                    'title': titles[0].strip(),
+                    'desc': descs[0].strip() if descs else ''
                 })
-        json_output = json.dumps(highlights, indent=2)
-        return json_output
+        return json_dumps(highlights) if highlights else ''
     
-    def extract_main_images(self, response):
+    def extract_main_images(self, app_data, simple_item):
         image_urls = []
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if json_script:
+        if app_data:
             try:
-                json_script = json_script.strip()
-                if json_script.startswith('<!--'):
-                    json_script = json_script[4:]
-                if json_script.endswith('-->'):
-                    json_script = json_script[:-3]
-                json_script = json_script.strip()
-                
-                data = json.loads(json_script)
-                content = data.get('data', {}).get('content', {})
-                product_layouts = content.get('productLayouts', {})
-                simple_items = product_layouts.get('simpleItems', [])
-                
-                current_url = response.url.rstrip('/')
-                
-                matching_item = None
-                for item in simple_items:
-                    if isinstance(item, dict):
-                        item_url = item.get('url', '').rstrip('/')
-                        if item_url and item_url == current_url:
-                            matching_item = item
-                            break
-                
-                if matching_item:
-                    gallery = matching_item.get('gallery', [])
+                if simple_item:
+                    gallery = simple_item.get('gallery', [])
                     if isinstance(gallery, list):
                         for img in gallery:
                             if isinstance(img, dict):
@@ -700,7 +699,7 @@ class ProductFetcher(Spider):
                             return '\n'.join(image_urls)
                 
                 if not image_urls:
-                    main_data = data.get('data', {})
+                    main_data = app_data.get('data', {})
                     content = main_data.get('content', {})
                     gallery = content.get('gallery', [])
                     if isinstance(gallery, list):
@@ -718,127 +717,52 @@ class ProductFetcher(Spider):
         
         return '\n'.join(image_urls) if image_urls else ''
 
-    def extract_dimensions(self, response):
-        json_script = response.xpath('//script[@data-hypernova-key="App"]/text()').get()
-        if not json_script:
+    def _iter_dimension_items(self, content):
+        """Yield every entry that can carry dimensions, in the order they are merged"""
+        items = content.get('setIncludes', {}).get('items', [])
+        yield from items
+        for item in items:
+            if isinstance(item, dict):
+                for config in item.get('configurables', []):
+                    if isinstance(config, dict):
+                        yield from config.get('options', [])
+
+        additional_items_data = content.get('additionalItems', {})
+        if isinstance(additional_items_data, dict):
+            yield from additional_items_data.get('items', [])
+
+        simple_items = content.get('productLayouts', {}).get('simpleItems', [])
+        if isinstance(simple_items, list):
+            yield from simple_items
+
+    def dimension_image_url(self, dimension):
+        image = dimension.get('image')
+        image_url = image.get('url', '') if isinstance(image, dict) else ''
+        if image_url and not self.is_valid_image_url(image_url):
+            return ''
+        return image_url
+
+    def extract_dimensions(self, app_data):
+        if not app_data:
             return ''
-        
-        json_script = json_script.strip()
-        if json_script.startswith('<!--'):
-            json_script = json_script[4:]
-        if json_script.endswith('-->'):
-            json_script = json_script[:-3]
-        json_script = json_script.strip()
         
         try:
-            data = json.loads(json_script)
-            content = data.get('data', {}).get('content', {})
-            setIncludes = content.get('setIncludes', {})
+            content = app_data.get('data', {}).get('content', {})
             
             result = {}
-            
-            items = setIncludes.get('items', [])
-            for item in items:
+            for item in self._iter_dimension_items(content):
                 if not isinstance(item, dict):
                     continue
                 
                 item_short_name = item.get('itemShortName', '')
-                dimension = item.get('dimension', {})
-                image_url = dimension.get('image', {}).get('url', '') if isinstance(dimension.get('image'), dict) else ''
-                if image_url and not self.is_valid_image_url(image_url):
-                    image_url = ''
-                dimensions_list = dimension.get('list', [])
-                
-                dimension_data = []
-                for dim in dimensions_list:
-                    if dim and isinstance(dim, str):
-                        dimension_data.append(dim)
-                
-                if item_short_name:
-                    result[item_short_name.lower()] = {
-                        "url": image_url,
-                        "data": dimension_data if dimension_data else []
-                    }
-            
-            for item in items:
-                if not isinstance(item, dict):
+                if not item_short_name:
                     continue
                 
-                configurables = item.get('configurables', [])
-                for config in configurables:
-                    if not isinstance(config, dict):
-                        continue
-                    
-                    options = config.get('options', [])
-                    for option in options:
-                        if not isinstance(option, dict):
-                            continue
-                        
-                        item_short_name = option.get('itemShortName', '')
-                        dimension = option.get('dimension', {})
-                        image_url = dimension.get('image', {}).get('url', '') if isinstance(dimension.get('image'), dict) else ''
-                        if image_url and not self.is_valid_image_url(image_url):
-                            image_url = ''
-                        dimensions_list = dimension.get('list', [])
-                        
-                        dimension_data = []
-                        for dim in dimensions_list:
-                            if dim and isinstance(dim, str):
-                                dimension_data.append(dim)
-                        
-                        if item_short_name:
-                            result[item_short_name.lower()] = {
-                                "url": image_url,
-                                "data": dimension_data if dimension_data else []
-                            }
-            
-            additional_items_data = content.get('additionalItems', {})
-            if isinstance(additional_items_data, dict):
-                additional_items = additional_items_data.get('items', [])
-                for item in additional_items:
-                    if not isinstance(item, dict):
-                        continue
-                    
-                    item_short_name = item.get('itemShortName', '')
-                    dimension = item.get('dimension', {})
-                    image_url = dimension.get('image', {}).get('url', '') if isinstance(dimension.get('image'), dict) else ''
-                    if image_url and not self.is_valid_image_url(image_url):
-                        image_url = ''
-                    dimensions_list = dimension.get('list', [])
-                    
-                    dimension_data = []
-                    for dim in dimensions_list:
-                        if dim and isinstance(dim, str):
-                            dimension_data.append(dim)
-                    
-                    if item_short_name:
-                        result[item_short_name.lower()] = {
-                            "url": image_url,
-                            "data": dimension_data if dimension_data else []
-                        }
-
-            simpleItems = content.get('productLayouts', {}).get('simpleItems', [])
-            if isinstance(simpleItems, list):
-                for item in simpleItems:
-                    if not isinstance(item, dict):
-                        continue
-                    item_short_name = item.get('itemShortName', '')
-                    dimension = item.get('dimension', {})
-                    image_url = dimension.get('image', {}).get('url', '') if isinstance(dimension.get('image'), dict) else ''
-                    if image_url and not self.is_valid_image_url(image_url):
-                        image_url = ''
-                    dimensions_list = dimension.get('list', [])
-                    
-                    dimension_data = []
-                    for dim in dimensions_list:
-                        if dim and isinstance(dim, str):
-                            dimension_data.append(dim)
-                    
-                    if item_short_name:
-                        result[item_short_name.lower()] = {
-                            "url": image_url,
-                            "data": dimension_data if dimension_data else []
-                        }
+                dimension = item.get('dimension', {})
+                result[item_short_name.lower()] = {
+                    "url": self.dimension_image_url(dimension),
+                    "data": [dim for dim in dimension.get('list', []) if dim and isinstance(dim, str)]
+                }
 
             if not result:
                 accordion_data = content.get('accordion', {})
@@ -846,23 +770,14 @@ class ProductFetcher(Spider):
                 
                 if dimensions_data and isinstance(dimensions_data, dict):
                     dimension_list = dimensions_data.get('dimensionList', [])
-                    
-                    image_url = dimensions_data.get('image', {}).get('url', '') if isinstance(dimensions_data.get('image'), dict) else ''
-                    if image_url and not self.is_valid_image_url(image_url):
-                        image_url = ''
-                    
-                    dimension_data = []
-                    for dim in dimension_list:
-                        if dim and isinstance(dim, str):
-                            dimension_data.append(dim)
-                    
+                    dimension_data = [dim for dim in dimension_list if dim and isinstance(dim, str)]
                     if dimension_data:
                         result["dimensions"] = {
-                            "url": image_url,
+                            "url": self.dimension_image_url(dimensions_data),
                             "data": dimension_data
                         }
             if result:
-                return json.dumps(result, indent=2)
+                return json_dumps_indented(result)
             return ''
             
         except Exception as e:
@@ -872,28 +787,17 @@ class ProductFetcher(Spider):
     def is_valid_image_url(self, url):
         if not url or not isinstance(url, str):
             return False
-        
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp']
-        url_lower = url.lower()
-        
-        if not (url_lower.startswith('http://') or url_lower.startswith('https://')):
-            return False
-        
-        if not any(url_lower.endswith(ext) for ext in image_extensions):
-            if not any(ext in url_lower for ext in image_extensions):
-                return False
-        
-        return True
+        return IMAGE_URL_RE.match(url) is not None
         
     def clean_price(self, price_text):
         if not price_text:
             return ''
         
-        cleaned = re.sub(r'[^\d.,]', '', price_text)
+        cleaned = PRICE_JUNK_RE.sub('', price_text)
         
         if ',' in cleaned and '.' in cleaned:
             if cleaned.rfind(',') > cleaned.rfind('.'):
-                cleaned = cleaned.replace('.', '').replace(',', '.')
+                cleaned = cleaned.translate(COMMA_DECIMAL_TABLE)
             else:
                 cleaned = cleaned.replace(',', '')
         
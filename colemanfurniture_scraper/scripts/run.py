@@ -63,6 +63,8 @@ def main():
     
     max_workers = int(os.getenv('MAX_WORKERS', '16'))
     settings.set('CONCURRENT_REQUESTS', max_workers)
+    # Sitemap parsing and product extraction run in the reactor thread pool
+    settings.set('REACTOR_THREADPOOL_MAXSIZE', 20)
     
     download_delay = float(os.getenv('DOWNLOAD_DELAY', '0.1'))
     settings.set('DOWNLOAD_DELAY', download_delay)
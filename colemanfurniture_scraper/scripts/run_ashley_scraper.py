@@ -243,6 +243,7 @@ def run_scraper_chunk(chunk_id, total_chunks, chunk_urls, output_dir, job_id, ma
     settings.set('FEED_URI', chunk_output)
     settings.set('FEED_FORMAT', 'csv')
     settings.set('CONCURRENT_REQUESTS', product_concurrency)
+    settings.set('REACTOR_THREADPOOL_MAXSIZE', 20)
     settings.set('CONCURRENT_REQUESTS_PER_DOMAIN', min(product_concurrency, 12))
     settings.set('DOWNLOAD_DELAY', 0.2)
     settings.set('RANDOMIZE_DOWNLOAD_DELAY', True)
@@ -421,6 +422,7 @@ def main():
             settings.set('FEED_URI', output_file)
             settings.set('FEED_FORMAT', 'csv')
             settings.set('CONCURRENT_REQUESTS', args.product_concurrency)
+            settings.set('REACTOR_THREADPOOL_MAXSIZE', 20)
             settings.set('CONCURRENT_REQUESTS_PER_DOMAIN', min(args.product_concurrency, 12))
             settings.set('DOWNLOAD_DELAY', 0.2)
             settings.set('RANDOMIZE_DOWNLOAD_DELAY', True)
@@ -1,14 +1,23 @@
 import requests
 import xml.etree.ElementTree as ET
 import gzip
-from typing import List
-from urllib.parse import urljoin
+import json
+import os
+from pathlib import Path
+from typing import List, Tuple
+from urllib.parse import urljoin, urlparse
 from .proxy_manager import ProxyManager
 import logging
 import time
 import sys
 
 logger = logging.getLogger(__name__)
+
+# Opt-in on-disk cache of the discovered sitemap list, for repeated local runs
+# against the same site. Off by default (TTL 0); CI shards each run on a fresh
+# runner and would never hit it.
+SITEMAP_CACHE_TTL = int(os.getenv('SITEMAP_CACHE_TTL', '0'))
+
 class SitemapProcessor:
     
     def __init__(self):
@@ -50,6 +59,39 @@ class SitemapProcessor:
         
         raise Exception(f"Failed to fetch {url} after {max_retries} attempts")
     
+    def discover_sitemaps(self, site_url: str) -> Tuple[str, List[str]]:
+        """Return (sitemap index URL, all sitemaps), reusing a recent on-disk result"""
+        if SITEMAP_CACHE_TTL <= 0:
+            index_url = self.get_sitemap_from_robots(site_url)
+            return index_url, self.extract_all_sitemaps(index_url)
+
+        # Resolved here, not at import: Path.home() raises when HOME is unset
+        cache_dir = Path(os.getenv('SITEMAP_CACHE_DIR') or Path.home() / '.cache' / 'colemanfurniture_scraper')
+        cache_key = (urlparse(site_url).netloc or 'default').replace(':', '_')
+        cache_file = cache_dir / f"{cache_key}.json"
+        try:
+            if time.time() - cache_file.stat().st_mtime < SITEMAP_CACHE_TTL:
+                cached = json.loads(cache_file.read_text())
+                logger.info(f"Using cached sitemap list from {cache_file}")
+                return cached['index'], cached['sitemaps']
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"No usable sitemap cache at {cache_file}: {e}")
+
+        index_url = self.get_sitemap_from_robots(site_url)
+        sitemaps = self.extract_all_sitemaps(index_url)
+
+        # Don't pin later runs to a failed or degenerate discovery
+        if sitemaps and sitemaps != [index_url]:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                # Write then rename so concurrent jobs never read a partial file
+                tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+                tmp_file.write_text(json.dumps({'index': index_url, 'sitemaps': sitemaps}))
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                logger.warning(f"Could not write sitemap cache {cache_file}: {e}")
+        return index_url, sitemaps
+
     def get_sitemap_from_robots(self, site_url: str) -> str:
         site_url = site_url.rstrip('/')
         robots_url = urljoin(site_url + '/', 'robots.txt')